@@ -1,43 +1,20 @@
 import base64
-import os
-import requests
 from io import BytesIO
 
 import gradio as gr
-import hdbscan
-import joblib
 import matplotlib.pyplot as plt
-import numpy as np
 import pandas as pd
 
+from inference import (
+    FEATURE_COLUMNS, normalize_input, predict_with_neighbors, prepare_models
+)
+from models import CACHE_DIR, format_timings, load_models
 
-def load_model_from_secret(secret_name):
-    url = os.environ.get(secret_name)
-    if url is None:
-        raise ValueError(f"Секрет {secret_name} не найден!")
-    response = requests.get(url)
-    if response.status_code == 200:
-        return joblib.load(BytesIO(response.content))
-    else:
-        raise Exception(f"Ошибка загрузки {url}: {response.status_code}")
-
-
-catboost_model = load_model_from_secret("CATBOOST_MODEL")
-cat_lower = load_model_from_secret("CAT_LOWER")
-cat_upper = load_model_from_secret("CAT_UPPER")
-
-rf_pipeline = load_model_from_secret("RF_PIPELINE")
-
-sgd_model = load_model_from_secret("SGD_MODEL")
-sgd_bagging = load_model_from_secret("SGD_BAGGING")
-
-hdbscan_model = load_model_from_secret("HDBSCAN_MODEL")
-cat_options = load_model_from_secret("CAT_OPTIONS")
 
-knn_model = load_model_from_secret("KNN_MODEL")
-scaler_knn = load_model_from_secret("SCALER_KNN")
-knn_columns = load_model_from_secret("KNN_COLUMNS")
-y_train = load_model_from_secret("Y_TRAIN")
+load_timings = {}
+models = prepare_models(load_models(timings=load_timings), cache_dir=CACHE_DIR)
+print(format_timings(load_timings))
+cat_options = models["cat_options"]
 
 
 def predict_price(room_count, lat, lon, series, material, floor,
@@ -81,62 +58,25 @@ def predict_price(room_count, lat, lon, series, material, floor,
         </div>
         """
 
-    coords = np.array([[lat, lon]])
-    label, _ = hdbscan.approximate_predict(hdbscan_model, coords)
-    cluster = str(label[0])
-    input_data = [[
+    input_df = normalize_input(pd.DataFrame([[
         room_count, lat, lon, series, material, floor, total_floors,
-        total_area, heating, condition, cluster
-    ]]
-    columns = [
-        'room_count', 'lat', 'lon', 'Серия', 'house_material', 'floor',
-        'total_floors', 'total_area', 'Отопление', 'Состояние',
-        'hdbscan_cluster'
-    ]
-    input_df = pd.DataFrame(input_data, columns=columns)
-
-    pred_cat = catboost_model.predict(input_data)[0]
-    lower_cat = cat_lower.predict(input_data)[0]
-    upper_cat = cat_upper.predict(input_data)[0]
-
-    rf_model = rf_pipeline.named_steps['rf']
-    X_transformed_rf = rf_pipeline.named_steps['preprocess'].transform(input_df)
-    preds_rf_all = [
-        tree.predict(X_transformed_rf)[0] for tree in rf_model.estimators_
-    ]
-    pred_rf = np.mean(preds_rf_all)
-    lower_rf = np.percentile(preds_rf_all, 2.5)
-    upper_rf = np.percentile(preds_rf_all, 97.5)
-
-    pred_sgd = sgd_model.predict(input_df)[0]
-    preds_sgd_all = [est.predict(input_df)[0] for est in sgd_bagging.estimators_]
-    lower_sgd = np.percentile(preds_sgd_all, 2.5)
-    upper_sgd = np.percentile(preds_sgd_all, 97.5)
-
-    avg_prediction = (pred_cat + pred_rf + pred_sgd) / 3
-
-    input_df_knn = input_df.copy()
-    num_cols = input_df_knn.select_dtypes(include=np.number).columns.tolist()
-    input_df_knn[num_cols] = scaler_knn.transform(input_df_knn[num_cols])
-    input_df_knn = pd.get_dummies(input_df_knn)
-    input_df_knn = input_df_knn.reindex(columns=knn_columns, fill_value=0)
-
-    if pred_cat <= 100000:
-        k = 30
-    elif pred_cat <= 250000:
-        k = 20
-    elif pred_cat <= 400000:
-        k = 10
-    else:
-        k = 5
-
-    neighbors_idx = knn_model.kneighbors(
-        input_df_knn, n_neighbors=k, return_distance=False
-    )[0]
-    neighbors_targets = y_train.iloc[neighbors_idx]
-    knn_mean = np.mean(neighbors_targets)
-    knn_lower = np.percentile(neighbors_targets, 2.5)
-    knn_upper = np.percentile(neighbors_targets, 97.5)
+        total_area, heating, condition
+    ]], columns=FEATURE_COLUMNS))
+    result, neighbors = predict_with_neighbors(models, input_df)
+    row = result.iloc[0]
+    pred_cat, lower_cat, upper_cat = (
+        row['catboost_pred'], row['catboost_lower'], row['catboost_upper']
+    )
+    pred_rf, lower_rf, upper_rf = row['rf_pred'], row['rf_lower'], row['rf_upper']
+    pred_sgd, lower_sgd, upper_sgd = (
+        row['sgd_pred'], row['sgd_lower'], row['sgd_upper']
+    )
+    avg_prediction = row['avg_pred']
+    k = int(row['knn_k'])
+    neighbors_targets = neighbors[0]
+    knn_mean, knn_lower, knn_upper = (
+        row['knn_mean'], row['knn_lower'], row['knn_upper']
+    )
 
     fig, ax = plt.subplots(figsize=(6, 4), dpi=120)
     fig.patch.set_alpha(0)
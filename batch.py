@@ -0,0 +1,98 @@
+"""Пакетная оценка квартир из CSV/Parquet.
+
+Пример:
+    python batch.py listings.parquet valuations.parquet --chunk-size 50000
+"""
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from inference import predict_frame, prepare_models
+from models import CACHE_DIR, load_models
+
+
+def _is_parquet(path):
+    return os.path.splitext(path)[1].lower() in ('.parquet', '.pq')
+
+
+def read_chunks(path, chunk_size):
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        for record_batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield record_batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+class ChunkWriter:
+    def __init__(self, path):
+        self.path = path
+        self._parquet_writer = None
+        self._header_written = False
+
+    def write(self, df):
+        if _is_parquet(self.path):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode='a' if self._header_written else 'w',
+                      header=not self._header_written, index=False)
+            self._header_written = True
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def predict_file(models, input_path, output_path, chunk_size=10000,
+                 keep_input=True):
+    """Потоковая оценка файла: в памяти одновременно только один чанк."""
+    rows = 0
+    with ChunkWriter(output_path) as writer:
+        for chunk in read_chunks(input_path, chunk_size):
+            result = predict_frame(models, chunk)
+            if keep_input:
+                result = pd.concat(
+                    [chunk.reset_index(drop=True), result], axis=1
+                )
+            writer.write(result)
+            rows += len(chunk)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('input', help='CSV или Parquet с признаками квартир')
+    parser.add_argument('output', help='Файл результата (.csv или .parquet)')
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--no-input-columns', action='store_true',
+                        help='Не копировать входные столбцы в результат')
+    args = parser.parse_args(argv)
+
+    models = prepare_models(load_models(), cache_dir=CACHE_DIR)
+    start = time.perf_counter()
+    rows = predict_file(models, args.input, args.output, args.chunk_size,
+                        keep_input=not args.no_input_columns)
+    elapsed = time.perf_counter() - start
+    print(f"{rows} строк за {elapsed:.1f} с "
+          f"({rows / max(elapsed, 1e-9):.0f} строк/с) -> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Пропускная способность: predict_frame против predict_price в цикле.
+
+Использует те же секреты с URL моделей, что и app.py:
+    python benchmarks/batch_throughput.py --rows 2000 --loop-rows 100
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inference import FEATURE_COLUMNS, predict_frame  # noqa: E402
+
+
+def sample_listings(cat_options, n, seed=0):
+    rng = np.random.default_rng(seed)
+    room_count = rng.integers(1, 6, n)
+    total_floors = rng.integers(1, 21, n)
+    return pd.DataFrame({
+        'room_count': room_count,
+        'lat': rng.uniform(42.800, 42.950, n),
+        'lon': rng.uniform(74.500, 74.750, n),
+        'Серия': rng.choice(cat_options['Серия'], n),
+        'house_material': rng.choice(cat_options['house_material'], n),
+        'floor': np.minimum(rng.integers(1, 21, n), total_floors),
+        'total_floors': total_floors,
+        'total_area': np.round(room_count * 25 + rng.uniform(5, 40, n), 1),
+        'Отопление': rng.choice(cat_options['Отопление'], n),
+        'Состояние': rng.choice(cat_options['Состояние'], n),
+    }, columns=FEATURE_COLUMNS)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--loop-rows', type=int, default=100)
+    args = parser.parse_args()
+
+    import app
+
+    listings = sample_listings(app.cat_options, args.rows)
+
+    start = time.perf_counter()
+    predict_frame(app.models, listings)
+    batch_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for row in listings.head(args.loop_rows).itertuples(index=False):
+        app.predict_price(*row)
+    loop_time = time.perf_counter() - start
+
+    batch_rate = args.rows / batch_time
+    loop_rate = args.loop_rows / loop_time
+    print(f"predict_frame:       {batch_rate:10.1f} строк/с ({args.rows} строк)")
+    print(f"predict_price цикл:  {loop_rate:10.1f} строк/с "
+          f"({args.loop_rows} строк)")
+    print(f"ускорение:           {batch_rate / loop_rate:10.1f}x")
+
+
+if __name__ == '__main__':
+    main()
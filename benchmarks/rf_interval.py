@@ -0,0 +1,63 @@
+"""Микробенчмарк интервала RandomForest: цикл tree.predict против CompiledForest.
+
+    python benchmarks/rf_interval.py --rows 1 1000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forest import CompiledForest  # noqa: E402
+
+
+def per_tree_loop(rf_model, X):
+    return np.stack([tree.predict(X) for tree in rf_model.estimators_], axis=1)
+
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[1, 1000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    from benchmarks.batch_throughput import sample_listings
+    from inference import assign_clusters
+    from models import load_models
+
+    models = load_models()
+    rf_model = models['rf_pipeline'].named_steps['rf']
+    start = time.perf_counter()
+    forest = CompiledForest(rf_model)
+    print(f"компиляция {forest.n_trees} деревьев: "
+          f"{(time.perf_counter() - start) * 1000:.1f} мс")
+
+    for n in args.rows:
+        input_df = sample_listings(models['cat_options'], n)
+        input_df['hdbscan_cluster'] = assign_clusters(models, input_df)
+        X = models['rf_pipeline'].named_steps['preprocess'].transform(input_df)
+
+        loop_time, expected = best_of(lambda: per_tree_loop(rf_model, X),
+                                      args.repeat)
+        flat_time, actual = best_of(lambda: forest.predict_trees(X),
+                                    args.repeat)
+        np.testing.assert_array_equal(actual, expected)
+        print(f"{n:>7} строк: цикл {loop_time * 1000:9.2f} мс, "
+              f"CompiledForest {flat_time * 1000:9.2f} мс, "
+              f"ускорение {loop_time / flat_time:6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""SGD Bagging: цикл по моделям против CompiledLinearEnsemble.
+
+Сверяет прогнозы всех моделей ансамбля и печатает время:
+    python benchmarks/sgd_bagging.py --rows 1 1000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from linear import CompiledLinearEnsemble  # noqa: E402
+
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[1, 1000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    from benchmarks.batch_throughput import sample_listings
+    from inference import (
+        MODEL_COLUMNS, NUMERIC_COLUMNS, assign_clusters, model_categories
+    )
+    from models import load_models
+
+    models = load_models()
+    estimators = models['sgd_bagging'].estimators_
+    start = time.perf_counter()
+    compiled = CompiledLinearEnsemble(
+        estimators, NUMERIC_COLUMNS, model_categories(models), MODEL_COLUMNS
+    )
+    print(f"компиляция {compiled.n_estimators} моделей "
+          f"({compiled.n_features} признаков): "
+          f"{(time.perf_counter() - start) * 1000:.1f} мс")
+
+    for n in args.rows:
+        input_df = sample_listings(models['cat_options'], n)
+        input_df['hdbscan_cluster'] = assign_clusters(models, input_df)
+
+        loop_time, expected = best_of(
+            lambda: np.stack([est.predict(input_df) for est in estimators],
+                             axis=1),
+            args.repeat,
+        )
+        compiled_time, actual = best_of(
+            lambda: compiled.predict_all(input_df), args.repeat
+        )
+        np.testing.assert_allclose(actual, expected, rtol=1e-9)
+        print(f"{n:>7} строк: цикл {loop_time * 1000:9.2f} мс, "
+              f"матрица {compiled_time * 1000:9.2f} мс, "
+              f"ускорение {loop_time / compiled_time:6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+import numpy as np
+import scipy.sparse as sp
+
+
+class CompiledForest:
+    """Плоское представление RandomForestRegressor для интервалов по деревьям.
+
+    Листовые значения всех деревьев склеены в один массив, поэтому матрица
+    прогнозов (строки x деревья) получается одной индексацией по номерам
+    листьев. Для малого числа строк спуск идёт одновременно по всем деревьям
+    на NumPy (число шагов равно глубине леса, а не числу деревьев), для
+    больших пакетов номера листьев берутся из Cython-метода Tree.apply.
+    Результат совпадает с tree.predict для каждого дерева.
+    """
+
+    def __init__(self, rf_model, flat_max_rows=16):
+        self.trees = [est.tree_ for est in rf_model.estimators_]
+        node_counts = np.array([tree.node_count for tree in self.trees])
+        self.roots = np.concatenate([[0], np.cumsum(node_counts)[:-1]])
+        self.n_trees = len(self.trees)
+        self.n_features = rf_model.n_features_in_
+        self.max_depth = max(tree.max_depth for tree in self.trees)
+        self.flat_max_rows = flat_max_rows
+
+        left = []
+        right = []
+        for root, tree in zip(self.roots, self.trees):
+            is_leaf = tree.children_left == -1
+            own = np.arange(tree.node_count)
+            # Лист ссылается сам на себя, поэтому лишние шаги спуска безопасны.
+            left.append(np.where(is_leaf, own, tree.children_left) + root)
+            right.append(np.where(is_leaf, own, tree.children_right) + root)
+        self.left = np.concatenate(left)
+        self.right = np.concatenate(right)
+        self.feature = np.concatenate(
+            [np.maximum(tree.feature, 0) for tree in self.trees]
+        )
+        self.threshold = np.concatenate([tree.threshold for tree in self.trees])
+        self.missing_left = np.concatenate([
+            getattr(tree, 'missing_go_to_left',
+                    np.zeros(tree.node_count, dtype=np.uint8)).astype(bool)
+            for tree in self.trees
+        ])
+        self.value = np.concatenate(
+            [tree.value[:, 0, 0] for tree in self.trees]
+        )
+
+    def predict_trees(self, X):
+        """Матрица прогнозов формы (n_rows, n_trees)."""
+        return self.value[self.apply(X)]
+
+    def apply(self, X):
+        """Глобальные номера листьев формы (n_rows, n_trees)."""
+        if sp.issparse(X):
+            X = X.toarray()
+        # Деревья sklearn сравнивают признаки во float32.
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(
+                f"Ожидалось {self.n_features} признаков, получено {X.shape}"
+            )
+        if len(X) <= self.flat_max_rows:
+            return self._apply_flat(X.astype(np.float64))
+        leaves = np.empty((len(X), self.n_trees), dtype=np.intp)
+        for i, tree in enumerate(self.trees):
+            leaves[:, i] = tree.apply(X)
+        return leaves + self.roots
+
+    def _apply_flat(self, X):
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), self.n_trees))
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[nodes]]
+            go_left = np.where(
+                np.isnan(x), self.missing_left[nodes],
+                x <= self.threshold[nodes]
+            )
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
@@ -0,0 +1,221 @@
+import warnings
+
+import hdbscan
+import numpy as np
+import pandas as pd
+
+from forest import CompiledForest
+from linear import load_or_compile
+
+FEATURE_COLUMNS = [
+    'room_count', 'lat', 'lon', 'Серия', 'house_material', 'floor',
+    'total_floors', 'total_area', 'Отопление', 'Состояние'
+]
+MODEL_COLUMNS = FEATURE_COLUMNS + ['hdbscan_cluster']
+NUMERIC_COLUMNS = [
+    'room_count', 'lat', 'lon', 'floor', 'total_floors', 'total_area'
+]
+
+# Имена аргументов predict_price -> имена признаков моделей.
+INPUT_ALIASES = {
+    'series': 'Серия',
+    'material': 'house_material',
+    'heating': 'Отопление',
+    'condition': 'Состояние',
+}
+
+RESULT_COLUMNS = [
+    'hdbscan_cluster',
+    'catboost_pred', 'catboost_lower', 'catboost_upper',
+    'rf_pred', 'rf_lower', 'rf_upper',
+    'sgd_pred', 'sgd_lower', 'sgd_upper',
+    'avg_pred',
+    'knn_k', 'knn_mean', 'knn_lower', 'knn_upper',
+]
+
+KNN_MAX_K = 30
+
+
+def model_categories(models):
+    categories = {
+        col: list(models['cat_options'][col])
+        for col in ['Серия', 'house_material', 'Отопление', 'Состояние']
+    }
+    labels = np.unique(models['hdbscan_model'].labels_)
+    categories['hdbscan_cluster'] = [str(label) for label in labels]
+    return categories
+
+
+def prepare_models(models, cache_dir=None):
+    """Добавляет к загруженным моделям производные структуры для инференса.
+
+    cache_dir — каталог для скомпилированных артефактов (None — без кэша).
+    """
+    models = dict(models)
+    models['rf_forest'] = CompiledForest(
+        models['rf_pipeline'].named_steps['rf']
+    )
+    try:
+        models['sgd_compiled'] = load_or_compile(
+            models['sgd_bagging'].estimators_, NUMERIC_COLUMNS,
+            model_categories(models), columns=MODEL_COLUMNS,
+            cache_dir=cache_dir,
+        )
+    except ValueError as e:
+        warnings.warn(f"SGD Bagging считается по моделям: {e}")
+        models['sgd_compiled'] = None
+    return models
+
+
+def normalize_input(df):
+    df = df.rename(columns=INPUT_ALIASES)
+    missing = [col for col in FEATURE_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Отсутствуют столбцы: {', '.join(missing)}")
+    df = df[FEATURE_COLUMNS].reset_index(drop=True)
+    return df.astype({col: float for col in NUMERIC_COLUMNS})
+
+
+def valid_mask(df):
+    room_count = df['room_count'].to_numpy(dtype=float)
+    total_area = df['total_area'].to_numpy(dtype=float)
+    floor = df['floor'].to_numpy(dtype=float)
+    total_floors = df['total_floors'].to_numpy(dtype=float)
+    lat = df['lat'].to_numpy(dtype=float)
+    lon = df['lon'].to_numpy(dtype=float)
+    with np.errstate(invalid='ignore'):
+        return (
+            (room_count >= 1) & (room_count <= 20)
+            & (total_area >= 1) & (total_area <= 1500)
+            & (floor >= 0) & (floor <= 40)
+            & (total_floors >= 1) & (total_floors <= 40)
+            & (lat >= 42.800) & (lat <= 42.950)
+            & (lon >= 74.500) & (lon <= 74.750)
+            & (floor <= total_floors)
+        )
+
+
+def assign_clusters(models, df):
+    coords = df[['lat', 'lon']].to_numpy(dtype=float)
+    labels, _ = hdbscan.approximate_predict(models['hdbscan_model'], coords)
+    return np.asarray(labels).astype(str)
+
+
+def adaptive_k(pred_cat):
+    pred_cat = np.asarray(pred_cat)
+    return np.select(
+        [pred_cat <= 100000, pred_cat <= 250000, pred_cat <= 400000],
+        [30, 20, 10],
+        default=5,
+    )
+
+
+def encode_knn(models, input_df):
+    input_df_knn = input_df.copy()
+    num_cols = input_df_knn.select_dtypes(include=np.number).columns.tolist()
+    input_df_knn[num_cols] = models['scaler_knn'].transform(input_df_knn[num_cols])
+    input_df_knn = pd.get_dummies(input_df_knn)
+    return input_df_knn.reindex(columns=models['knn_columns'], fill_value=0)
+
+
+def rf_tree_predictions(models, input_df):
+    rf_pipeline = models['rf_pipeline']
+    X_transformed_rf = rf_pipeline.named_steps['preprocess'].transform(input_df)
+    return models['rf_forest'].predict_trees(X_transformed_rf)
+
+
+def sgd_bagging_predictions(models, input_df):
+    estimators = models['sgd_bagging'].estimators_
+    compiled = models.get('sgd_compiled')
+    if compiled is None:
+        return np.stack([est.predict(input_df) for est in estimators], axis=1)
+
+    preds = np.empty((len(input_df), len(estimators)))
+    known = compiled.known_mask(input_df)
+    preds[known] = compiled.predict_all(input_df[known])
+    if not known.all():
+        # Категории вне cat_options: считаем по исходным моделям.
+        unknown_df = input_df[~known]
+        preds[~known] = np.stack(
+            [est.predict(unknown_df) for est in estimators], axis=1
+        )
+    return preds
+
+
+def predict_with_neighbors(models, features):
+    """Прогноз всех моделей для уже проверенных строк.
+
+    Возвращает таблицу RESULT_COLUMNS и список цен соседей для каждой строки.
+    """
+    input_df = features[FEATURE_COLUMNS].reset_index(drop=True)
+    input_df['hdbscan_cluster'] = assign_clusters(models, input_df)
+    input_data = input_df.to_numpy(dtype=object)
+
+    pred_cat = models['catboost_model'].predict(input_data)
+    lower_cat = models['cat_lower'].predict(input_data)
+    upper_cat = models['cat_upper'].predict(input_data)
+
+    preds_rf_all = rf_tree_predictions(models, input_df)
+    pred_rf = preds_rf_all.mean(axis=1)
+    lower_rf, upper_rf = np.percentile(preds_rf_all, [2.5, 97.5], axis=1)
+
+    pred_sgd = models['sgd_model'].predict(input_df)
+    preds_sgd_all = sgd_bagging_predictions(models, input_df)
+    lower_sgd, upper_sgd = np.percentile(preds_sgd_all, [2.5, 97.5], axis=1)
+
+    avg_prediction = (pred_cat + pred_rf + pred_sgd) / 3
+
+    # Один запрос с максимальным k: первые k соседей совпадают
+    # с отдельным запросом kneighbors(n_neighbors=k).
+    k = adaptive_k(pred_cat)
+    neighbors_idx = models['knn_model'].kneighbors(
+        encode_knn(models, input_df), n_neighbors=KNN_MAX_K,
+        return_distance=False
+    )
+    y_values = np.asarray(models['y_train'])
+    neighbors_targets = [
+        y_values[idx[:row_k]] for idx, row_k in zip(neighbors_idx, k)
+    ]
+    knn_stats = np.array([
+        [np.mean(t), np.percentile(t, 2.5), np.percentile(t, 97.5)]
+        for t in neighbors_targets
+    ]).reshape(-1, 3)
+
+    result = pd.DataFrame({
+        'hdbscan_cluster': input_df['hdbscan_cluster'],
+        'catboost_pred': pred_cat,
+        'catboost_lower': lower_cat,
+        'catboost_upper': upper_cat,
+        'rf_pred': pred_rf,
+        'rf_lower': lower_rf,
+        'rf_upper': upper_rf,
+        'sgd_pred': pred_sgd,
+        'sgd_lower': lower_sgd,
+        'sgd_upper': upper_sgd,
+        'avg_pred': avg_prediction,
+        'knn_k': k,
+        'knn_mean': knn_stats[:, 0],
+        'knn_lower': knn_stats[:, 1],
+        'knn_upper': knn_stats[:, 2],
+    }, columns=RESULT_COLUMNS)
+    return result, neighbors_targets
+
+
+def predict_frame(models, df):
+    """Оценка портфеля квартир: одна строка результата на строку входа.
+
+    Строки, не прошедшие проверку диапазонов, получают valid=False и NaN.
+    """
+    features = normalize_input(df)
+    mask = valid_mask(features)
+    if mask.any():
+        predicted, _ = predict_with_neighbors(models, features[mask])
+        predicted.index = features.index[mask]
+        result = predicted.reindex(features.index)
+    else:
+        result = pd.DataFrame(index=features.index, columns=RESULT_COLUMNS)
+    # Постоянная схема между чанками, даже если все строки невалидны.
+    result = result.astype({col: float for col in RESULT_COLUMNS[1:]})
+    result['hdbscan_cluster'] = result['hdbscan_cluster'].astype('string')
+    result.insert(0, 'valid', mask)
+    return result
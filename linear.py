@@ -0,0 +1,120 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+
+
+class CompiledLinearEnsemble:
+    """Ансамбль линейных пайплайнов как одна матрица коэффициентов.
+
+    Каждый пайплайн SGD (OneHotEncoder + StandardScaler + SGDRegressor)
+    аффинен по числовым признакам и аддитивен по категориям, поэтому его
+    можно восстановить пробными строками: базовая строка даёт свободный член,
+    единица в каждом числовом признаке и каждая категория — коэффициенты.
+    После этого все прогнозы ансамбля — одно умножение
+    transform(df) @ coef_.T + intercept_, для одной строки или миллиона.
+    """
+
+    def __init__(self, estimators, numeric_columns, categories, columns=None,
+                 seed=0):
+        self.numeric_columns = list(numeric_columns)
+        self.categories = {
+            col: list(dict.fromkeys(values))
+            for col, values in categories.items()
+        }
+        self.columns = list(columns or
+                            self.numeric_columns + list(self.categories))
+        self.n_estimators = len(estimators)
+        self._indexes = {
+            col: pd.Index(values) for col, values in self.categories.items()
+        }
+
+        probe = self._probe_frame()
+        responses = np.stack(
+            [est.predict(probe) for est in estimators], axis=1
+        )
+        self.intercept_ = responses[0]
+        # Строка базы кодируется нулями, поэтому коэффициенты — это просто
+        # приращения прогноза относительно неё.
+        self.coef_ = (responses[1:] - self.intercept_).T
+        self._check(estimators, seed)
+
+    @property
+    def n_features(self):
+        return self.coef_.shape[1]
+
+    def _base_row(self):
+        row = dict.fromkeys(self.numeric_columns, 0.0)
+        row.update({col: values[0] for col, values in self.categories.items()})
+        return row
+
+    def _probe_frame(self):
+        base = self._base_row()
+        rows = [base]
+        for col in self.numeric_columns:
+            rows.append({**base, col: 1.0})
+        for col, values in self.categories.items():
+            rows.extend({**base, col: value} for value in values[1:])
+        return pd.DataFrame(rows, columns=self.columns)
+
+    def transform(self, df):
+        """Общая для всех моделей ансамбля матрица признаков.
+
+        Числовые признаки идут как есть, категории — one-hot без базовой
+        категории (она входит в свободный член).
+        """
+        parts = [df[self.numeric_columns].to_numpy(dtype=float)]
+        for col, values in self.categories.items():
+            codes = self._indexes[col].get_indexer(df[col])
+            one_hot = np.zeros((len(df), len(values) - 1))
+            rows = np.flatnonzero(codes >= 1)
+            one_hot[rows, codes[rows] - 1] = 1.0
+            parts.append(one_hot)
+        return np.hstack(parts)
+
+    def known_mask(self, df):
+        """Строки, все категории которых учтены при компиляции."""
+        mask = np.ones(len(df), dtype=bool)
+        for col, index in self._indexes.items():
+            mask &= index.get_indexer(df[col]) >= 0
+        return mask
+
+    def predict_all(self, df):
+        """Прогнозы всех моделей ансамбля формы (n_rows, n_estimators)."""
+        return self.transform(df) @ self.coef_.T + self.intercept_
+
+    def _check(self, estimators, seed, n_rows=32):
+        rng = np.random.default_rng(seed)
+        sample = pd.DataFrame({
+            **{col: rng.normal(0, 10, n_rows) for col in self.numeric_columns},
+            **{col: rng.choice(values, n_rows)
+               for col, values in self.categories.items()},
+        }, columns=self.columns)
+        expected = np.stack([est.predict(sample) for est in estimators], axis=1)
+        actual = self.predict_all(sample)
+        scale = max(1.0, np.abs(expected).max())
+        if not np.allclose(actual, expected, rtol=0, atol=1e-8 * scale):
+            raise ValueError(
+                "Ансамбль не сводится к линейной форме: "
+                f"расхождение {np.abs(actual - expected).max():.3g}"
+            )
+
+
+def load_or_compile(estimators, numeric_columns, categories, columns=None,
+                    cache_dir=None):
+    """CompiledLinearEnsemble с кэшем на диске по хэшу моделей и категорий."""
+    if cache_dir is None:
+        return CompiledLinearEnsemble(estimators, numeric_columns, categories,
+                                      columns)
+    key = joblib.hash((estimators, list(numeric_columns), categories, columns))
+    path = os.path.join(cache_dir, f"linear_ensemble_{key}.pkl")
+    if os.path.exists(path):
+        return joblib.load(path)
+    compiled = CompiledLinearEnsemble(estimators, numeric_columns, categories,
+                                      columns)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(compiled, tmp_path)
+    os.replace(tmp_path, path)
+    return compiled
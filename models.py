@@ -0,0 +1,225 @@
+import hashlib
+import json
+import os
+import requests
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+
+
+MODEL_SECRETS = {
+    "catboost_model": "CATBOOST_MODEL",
+    "cat_lower": "CAT_LOWER",
+    "cat_upper": "CAT_UPPER",
+    "rf_pipeline": "RF_PIPELINE",
+    "sgd_model": "SGD_MODEL",
+    "sgd_bagging": "SGD_BAGGING",
+    "hdbscan_model": "HDBSCAN_MODEL",
+    "cat_options": "CAT_OPTIONS",
+    "knn_model": "KNN_MODEL",
+    "scaler_knn": "SCALER_KNN",
+    "knn_columns": "KNN_COLUMNS",
+    "y_train": "Y_TRAIN",
+}
+
+# Артефакты, которые лежат в репозитории и не требуют секрета.
+_ADDITIONAL_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "additional"
+)
+LOCAL_ARTIFACTS = {
+    "HDBSCAN_MODEL": os.path.join(_ADDITIONAL_DIR, "hdbscan_model.pkl"),
+    "CAT_OPTIONS": os.path.join(_ADDITIONAL_DIR, "category_options.pkl"),
+}
+
+CACHE_DIR = os.environ.get(
+    "MODEL_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "bishkek_real_estate"),
+)
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """Локальный кэш артефактов моделей.
+
+    Файлы хранятся под именем sha256 содержимого, индекс сопоставляет URL
+    с хэшем и ETag/Last-Modified. При старте отправляется условный запрос:
+    304 — берём файл из кэша без скачивания. Если сеть недоступна или
+    сервер отвечает ошибкой, используется последняя проверенная копия.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, timeout=30, offline=None,
+                 mmap_mode="r"):
+        self.cache_dir = os.path.join(cache_dir, "artifacts")
+        self.timeout = timeout
+        if offline is None:
+            offline = os.environ.get("MODEL_OFFLINE") == "1"
+        self.offline = offline
+        self.mmap_mode = mmap_mode
+        self._index_path = os.path.join(self.cache_dir, "index.json")
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def _url_key(url):
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _read_index(self):
+        try:
+            with open(self._index_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _update_index(self, url, entry):
+        with self._lock:
+            index = self._read_index()
+            index[self._url_key(url)] = entry
+            tmp_path = f"{self._index_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(index, f, indent=1)
+            os.replace(tmp_path, self._index_path)
+
+    def _cached(self, url, expected_sha256=None):
+        with self._lock:
+            entry = self._read_index().get(self._url_key(url))
+        if entry is None:
+            return None
+        path = os.path.join(self.cache_dir, f"{entry['sha256']}.pkl")
+        if not os.path.exists(path) or _sha256(path) != entry["sha256"]:
+            return None
+        if expected_sha256 and entry["sha256"] != expected_sha256:
+            return None
+        return entry, path
+
+    def fetch(self, url, expected_sha256=None):
+        """Путь к проверенному локальному файлу и источник: network/cache."""
+        cached = self._cached(url, expected_sha256)
+        if self.offline:
+            if cached is None:
+                raise Exception(f"Нет кэша для {url} в офлайн-режиме")
+            return cached[1], "cache"
+
+        headers = {}
+        if cached is not None:
+            entry = cached[0]
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        try:
+            response = requests.get(url, headers=headers, stream=True,
+                                    timeout=self.timeout)
+        except requests.RequestException:
+            if cached is None:
+                raise
+            return cached[1], "cache"
+
+        with response:
+            if response.status_code == 304 and cached is not None:
+                return cached[1], "cache"
+            if response.status_code != 200:
+                if cached is not None:
+                    return cached[1], "cache"
+                raise Exception(
+                    f"Ошибка загрузки {url}: {response.status_code}"
+                )
+            path, sha256 = self._download(response)
+
+        if expected_sha256 and sha256 != expected_sha256:
+            os.remove(path)
+            raise Exception(
+                f"Контрольная сумма {url} не совпадает: {sha256}"
+            )
+        self._update_index(url, {
+            "sha256": sha256,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        })
+        return path, "network"
+
+    def _download(self, response):
+        digest = hashlib.sha256()
+        tmp_path = os.path.join(
+            self.cache_dir, f"download.{threading.get_ident()}.tmp"
+        )
+        with open(tmp_path, "wb") as f:
+            for block in response.iter_content(chunk_size=1 << 20):
+                digest.update(block)
+                f.write(block)
+        sha256 = digest.hexdigest()
+        path = os.path.join(self.cache_dir, f"{sha256}.pkl")
+        os.replace(tmp_path, path)
+        return path, sha256
+
+    def load(self, path):
+        # Большие numpy-массивы отображаются в память, а не копируются.
+        return joblib.load(path, mmap_mode=self.mmap_mode)
+
+
+def _artifact_location(secret_name):
+    location = os.environ.get(secret_name)
+    if location is None:
+        location = LOCAL_ARTIFACTS.get(secret_name)
+    if location is None:
+        raise ValueError(f"Секрет {secret_name} не найден!")
+    return location
+
+
+def load_model_from_secret(secret_name, store=None, timings=None):
+    location = _artifact_location(secret_name)
+    store = store or ArtifactStore()
+    start = time.perf_counter()
+    if location.startswith(("http://", "https://")):
+        path, source = store.fetch(
+            location, os.environ.get(f"{secret_name}_SHA256")
+        )
+    else:
+        path, source = location, "local"
+    fetched = time.perf_counter()
+    model = store.load(path)
+    if timings is not None:
+        timings[secret_name] = {
+            "source": source,
+            "bytes": os.path.getsize(path),
+            "fetch_s": fetched - start,
+            "load_s": time.perf_counter() - fetched,
+        }
+    return model
+
+
+def load_models(store=None, timings=None, max_workers=8):
+    """Параллельная загрузка всех артефактов.
+
+    Если передан словарь timings, в него записывается время получения
+    и десериализации каждого артефакта.
+    """
+    store = store or ArtifactStore()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            name: pool.submit(load_model_from_secret, secret, store, timings)
+            for name, secret in MODEL_SECRETS.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+
+def format_timings(timings):
+    lines = [f"{'артефакт':<16}{'источник':>10}{'МБ':>9}"
+             f"{'получение, с':>14}{'загрузка, с':>13}"]
+    for secret_name, t in sorted(
+        timings.items(), reverse=True,
+        key=lambda item: item[1]["fetch_s"] + item[1]["load_s"],
+    ):
+        lines.append(
+            f"{secret_name:<16}{t['source']:>10}{t['bytes'] / 2**20:>9.2f}"
+            f"{t['fetch_s']:>14.3f}{t['load_s']:>13.3f}"
+        )
+    return "\n".join(lines)